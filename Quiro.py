@@ -1,10 +1,80 @@
 import sys
 import os
+import stat
+import random
+import bisect
+import math
+import time
+import queue
+import threading
+from collections import deque
+from PyQt6.QtCore import Qt, QUrl, QSize, QThread, pyqtSignal, QRunnable, QThreadPool, QObject, QTimer
+from PyQt6.QtNetwork import QLocalServer, QLocalSocket
+
+# Local socket name used to reach an already running player (one per user)
+INSTANCE_SERVER_NAME = "Quiro-" + (os.environ.get("USER") or os.environ.get("USERNAME") or "default")
+INSTANCE_TIMEOUT_MS = 250
+INSTANCE_BATCH_MS = 300  # forwarded paths arriving this close together are opened as one batch
+
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".flac", ".ogg", ".m4a")
+
+def collect_launch_paths(args):
+    """Return absolute paths of the existing files and folders given on the command line"""
+    return [os.path.abspath(arg) for arg in args if os.path.exists(arg)]
+
+def forward_to_running_instance(paths):
+    """Hand paths to a running player, return True if one received them"""
+    socket = QLocalSocket()
+    socket.connectToServer(INSTANCE_SERVER_NAME)
+    if not socket.waitForConnected(INSTANCE_TIMEOUT_MS):
+        return False
+    send_paths(socket, paths)
+    return True
+
+def send_paths(socket, paths):
+    # Paths are NUL separated, the only byte that cannot appear in a path.
+    # fsencode keeps names that are not valid UTF-8 (surrogate escapes in argv)
+    socket.write(b"\0".join(os.fsencode(path) for path in paths))
+    socket.waitForBytesWritten(INSTANCE_TIMEOUT_MS)
+    socket.disconnectFromServer()
+    if socket.state() != QLocalSocket.LocalSocketState.UnconnectedState:
+        socket.waitForDisconnected(INSTANCE_TIMEOUT_MS)
+
+def claim_instance_server(paths):
+    """Listen as the single instance, or hand paths to the live one and return None"""
+    server = QLocalServer()
+    for attempt in range(2):
+        if server.listen(INSTANCE_SERVER_NAME):
+            return server
+        
+        # Launches started together all miss the fast path, so the name may
+        # belong to one that started listening in the meantime
+        socket = QLocalSocket()
+        socket.connectToServer(INSTANCE_SERVER_NAME)
+        if socket.waitForConnected(INSTANCE_TIMEOUT_MS):
+            send_paths(socket, paths)
+            return None
+        if socket.error() not in (QLocalSocket.LocalSocketError.ServerNotFoundError,
+                                  QLocalSocket.LocalSocketError.ConnectionRefusedError):
+            break
+        
+        # Nobody is listening, a crashed instance left a stale socket behind
+        QLocalServer.removeServer(INSTANCE_SERVER_NAME)
+    print(f"Instance server error: {server.errorString()}")
+    return server
+
+# Forward the launch to a running player before paying for widgets,
+# multimedia and mutagen below
+if __name__ == "__main__":
+    launch_paths = collect_launch_paths(sys.argv[1:])
+    if forward_to_running_instance(launch_paths):
+        sys.exit(0)
+
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QPushButton, QSlider, QLabel, 
                             QFileDialog, QStyle, QListWidget, QSplitter,
-                            QProgressDialog, QStatusBar, QListWidgetItem)
-from PyQt6.QtCore import Qt, QUrl, QDir, QThread, pyqtSignal, QRunnable, QThreadPool, QObject, QTimer
+                            QProgressDialog, QStatusBar, QListWidgetItem, QMenu,
+                            QTreeWidget, QTreeWidgetItem)
 from PyQt6.QtGui import QIcon, QPixmap
 from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
 import mutagen  # Import mutagen for metadata extraction
@@ -19,6 +89,100 @@ elif sys.platform.startswith("darwin"):
 else: #if windows
     os.environ["QT_MEDIA_BACKEND"] = "windows"  # Явно указываем Windows бэкенд
 
+# Ingestion mode for high-latency storage (NFS/SMB mounts)
+NETWORK_MODE = os.environ.get("QUIRO_NETWORK_MODE") == "1"
+NETWORK_TIMEOUT = 10.0  # seconds before a stalled read is abandoned
+NETWORK_RETRIES = 2
+NETWORK_MIN_IN_FLIGHT = 2
+NETWORK_MAX_IN_FLIGHT = 64
+NETWORK_TARGET_INTERVAL = 0.01  # aim for one finished file every 10 ms
+NETWORK_SLOW_AFTER = 1.0  # seconds before an in-flight read is reported as pending
+NETWORK_MAX_THREADS = 128
+
+# Reader threads alive across all ingestion, including ones stuck on a dead mount
+reader_slots = threading.BoundedSemaphore(NETWORK_MAX_THREADS)
+
+# Filesystem access used during ingestion
+class LocalFileSystem:
+    def open(self, path):
+        return open(path, "rb")
+    
+    # Both raise OSError instead of hiding it (as os.path.isdir and QDir do),
+    # so failing mounts reach the retry and skip handling
+    def is_dir(self, path):
+        return stat.S_ISDIR(os.stat(path).st_mode)
+    
+    def list_audio_files(self, folder_path):
+        folder_path = os.path.abspath(folder_path)
+        with os.scandir(folder_path) as entries:
+            names = [entry.name for entry in entries
+                     if not entry.name.startswith(".")
+                     and entry.name.lower().endswith(AUDIO_EXTENSIONS)
+                     and entry.is_file()]
+        
+        # Same order as QDir's default listing
+        names.sort(key=str.lower)
+        return [os.path.join(folder_path, name) for name in names]
+
+# Local filesystem with artificial latency, to try slow mounts without one
+class SlowFileSystem(LocalFileSystem):
+    def __init__(self, delay, stall_chance=0.0, stall=30.0):
+        self.delay = delay
+        self.stall_chance = stall_chance
+        self.stall = stall
+    
+    def wait(self):
+        if random.random() < self.stall_chance:
+            time.sleep(self.stall)
+        else:
+            time.sleep(random.uniform(0.5, 1.5) * self.delay)
+    
+    def open(self, path):
+        self.wait()
+        return super().open(path)
+    
+    def is_dir(self, path):
+        self.wait()
+        return super().is_dir(path)
+    
+    def list_audio_files(self, folder_path):
+        self.wait()
+        return super().list_audio_files(folder_path)
+
+def create_filesystem():
+    """Return the filesystem to ingest from, slowed down if QUIRO_FS_DELAY is set"""
+    delay = float(os.environ.get("QUIRO_FS_DELAY", "0"))
+    stall_chance = float(os.environ.get("QUIRO_FS_STALL", "0"))
+    if delay > 0 or stall_chance > 0:
+        return SlowFileSystem(delay, stall_chance)
+    return LocalFileSystem()
+
+def call_with_timeout(fn, *args):
+    """Run fn on a reader thread, retrying I/O errors and giving up if it stalls past NETWORK_TIMEOUT"""
+    for attempt in range(NETWORK_RETRIES + 1):
+        if not reader_slots.acquire(timeout=NETWORK_TIMEOUT):
+            raise TimeoutError("Too many reads stuck on slow storage")
+        completions = queue.Queue()
+        
+        def call():
+            try:
+                completions.put((fn(*args), None))
+            except Exception as e:
+                completions.put((None, e))
+            finally:
+                reader_slots.release()
+        
+        threading.Thread(target=call, daemon=True).start()
+        try:
+            result, error = completions.get(timeout=NETWORK_TIMEOUT)
+        except queue.Empty:
+            # The call is still blocked, a retry would only pile up behind it
+            raise TimeoutError(f"No response after {NETWORK_TIMEOUT:g}s")
+        if error is None:
+            return result
+        if not isinstance(error, OSError) or attempt == NETWORK_RETRIES:
+            raise error
+
 # Worker signal class for thread communication
 class WorkerSignals(QObject):
     finished = pyqtSignal()
@@ -26,6 +190,8 @@ class WorkerSignals(QObject):
     result = pyqtSignal(object)
     progress = pyqtSignal(int)
     debug = pyqtSignal(str)
+    pending = pyqtSignal(object)
+    skipped = pyqtSignal(object)
 
 # Worker class for background tasks
 class Worker(QRunnable):
@@ -47,9 +213,13 @@ class Worker(QRunnable):
 
 # File processor worker with progress updates
 class FileProcessorWorker(QRunnable):
-    def __init__(self, file_paths):
+    # Raise OSError from opening a file instead of adding it without metadata
+    retry_io_errors = False
+    
+    def __init__(self, file_paths, filesystem=None):
         super(FileProcessorWorker, self).__init__()
         self.file_paths = file_paths
+        self.filesystem = filesystem or LocalFileSystem()
         self.signals = WorkerSignals()
         self.is_cancelled = False
 
@@ -62,18 +232,7 @@ class FileProcessorWorker(QRunnable):
                     break
                 
                 self.signals.debug.emit(f"Processing: {os.path.basename(file_path)}")
-                file_info = QUrl.fromLocalFile(file_path)
-                file_name = os.path.basename(file_path)
-                
-                # Extract metadata
-                metadata = self.extract_metadata(file_path)
-                
-                processed_files.append({
-                    "url": file_info, 
-                    "name": file_name, 
-                    "path": file_path,
-                    "metadata": metadata
-                })
+                processed_files.append(self.process_file(file_path))
                 
                 # Emit progress signal for UI updates
                 self.signals.progress.emit(i + 1)
@@ -84,43 +243,62 @@ class FileProcessorWorker(QRunnable):
         finally:
             self.signals.finished.emit()
     
+    def process_file(self, file_path):
+        """Build the playlist entry for one file"""
+        return {
+            "url": QUrl.fromLocalFile(file_path), 
+            "name": os.path.basename(file_path), 
+            "path": file_path,
+            "metadata": self.extract_metadata(file_path)
+        }
+    
     def extract_metadata(self, file_path):
         """Extract metadata from audio file"""
         try:
-            audio = mutagen.File(file_path, easy=True)
-            metadata = {
-                "title": "",
-                "artist": "",
-                "album": "",
-                "genre": "",
-                "year": "",
-                "cover": None
-            }
-            
-            if audio:
-                metadata.update({
-                    "title": audio.get("title", [""])[0],
-                    "artist": audio.get("artist", [""])[0],
-                    "album": audio.get("album", [""])[0],
-                    "genre": audio.get("genre", [""])[0],
-                    "year": audio.get("date", [""])[0]
-                })
-            
-            # Try to extract album art
-            try:
-                if file_path.lower().endswith('.mp3'):
-                    id3 = ID3(file_path)
-                    for tag in id3.values():
-                        if isinstance(tag, APIC):
-                            metadata["cover"] = tag.data
-                            break
-                elif hasattr(audio, 'pictures') and audio.pictures:
-                    metadata["cover"] = audio.pictures[0].data
-            except Exception as e:
-                self.signals.debug.emit(f"Cover extraction error: {str(e)}")
-            
-            return metadata
+            # Open once through the filesystem so slow mounts are hit a single time
+            with self.filesystem.open(file_path) as audio_file:
+                audio = mutagen.File(audio_file, easy=True)
+                metadata = {
+                    "title": "",
+                    "artist": "",
+                    "album": "",
+                    "genre": "",
+                    "year": "",
+                    "duration": 0.0,
+                    "cover": None
+                }
+                
+                if audio:
+                    metadata.update({
+                        "title": audio.get("title", [""])[0],
+                        "artist": audio.get("artist", [""])[0],
+                        "album": audio.get("album", [""])[0],
+                        "genre": audio.get("genre", [""])[0],
+                        "year": audio.get("date", [""])[0]
+                    })
+                
+                # A file without tags is falsy but still has stream info
+                if audio is not None:
+                    metadata["duration"] = getattr(audio.info, "length", 0.0) or 0.0
+                
+                # Try to extract album art
+                try:
+                    if file_path.lower().endswith('.mp3'):
+                        audio_file.seek(0)
+                        id3 = ID3(audio_file)
+                        for tag in id3.values():
+                            if isinstance(tag, APIC):
+                                metadata["cover"] = tag.data
+                                break
+                    elif hasattr(audio, 'pictures') and audio.pictures:
+                        metadata["cover"] = audio.pictures[0].data
+                except Exception as e:
+                    self.signals.debug.emit(f"Cover extraction error: {str(e)}")
+                
+                return metadata
         except Exception as e:
+            if isinstance(e, OSError) and self.retry_io_errors:
+                raise
             self.signals.debug.emit(f"Metadata extraction error: {str(e)}")
             return {
                 "title": "",
@@ -128,14 +306,454 @@ class FileProcessorWorker(QRunnable):
                 "album": "",
                 "genre": "",
                 "year": "",
+                "duration": 0.0,
                 "cover": None
             }
     
     def cancel(self):
         self.is_cancelled = True
 
-class MediaPlayer(QMainWindow):
+# File processor for high-latency storage: keeps many reads in flight and
+# abandons reads that stall, since a blocked open() cannot be interrupted
+class NetworkFileProcessorWorker(FileProcessorWorker):
+    retry_io_errors = True
+    
+    def run(self):
+        try:
+            results = [None] * len(self.file_paths)
+            waiting = deque((index, 0) for index in range(len(self.file_paths)))
+            in_flight = {}  # (index, attempt) -> start time
+            abandoned = {}  # timed out attempts still blocked in their thread -> time abandoned
+            completions = queue.Queue()
+            skipped = []
+            finished = 0
+            latency = None
+            ceiling = NETWORK_MAX_IN_FLIGHT  # halved on every stall, regrows per answer
+            limit = NETWORK_MIN_IN_FLIGHT
+            last_answer = last_report = time.monotonic()
+            
+            def skip(index):
+                nonlocal finished
+                skipped.append(self.file_paths[index])
+                finished += 1
+                self.signals.progress.emit(finished)
+            
+            while (waiting or in_flight or abandoned) and not self.is_cancelled:
+                # Abandoned threads keep their slot, so a dead mount cannot pile up threads
+                while waiting and len(in_flight) < limit and reader_slots.acquire(blocking=False):
+                    token = waiting.popleft()
+                    in_flight[token] = time.monotonic()
+                    # Daemon threads, so reads stuck on a dead mount never block exit
+                    threading.Thread(target=self.read_file, args=(token, completions), daemon=True).start()
+                
+                try:
+                    token, file_data = completions.get(timeout=0.1)
+                except queue.Empty:
+                    token = None
+                now = time.monotonic()
+                
+                # Answers from attempts given up on arrive too late and are dropped
+                if token in in_flight or token in abandoned:
+                    if token in in_flight:
+                        # Only answers within the timeout describe the storage's latency
+                        sample = now - in_flight.pop(token)
+                        latency = sample if latency is None else 0.8 * latency + 0.2 * sample
+                        ceiling = min(NETWORK_MAX_IN_FLIGHT, ceiling + 1)
+                    else:
+                        del abandoned[token]
+                    last_answer = now
+                    index, attempt = token
+                    if file_data is not None:
+                        results[index] = file_data
+                        finished += 1
+                        self.signals.progress.emit(finished)
+                    elif attempt < NETWORK_RETRIES:
+                        waiting.append((index, attempt + 1))
+                    else:
+                        skip(index)
+                
+                for token, started in list(in_flight.items()):
+                    if now - started > NETWORK_TIMEOUT:
+                        # No retry while this read is still blocked: it would only add
+                        # load on the stalled server. Give it one more timeout to fail.
+                        del in_flight[token]
+                        abandoned[token] = now
+                        ceiling = max(NETWORK_MIN_IN_FLIGHT, ceiling // 2)
+                        self.signals.debug.emit(f"Stalled: {os.path.basename(self.file_paths[token[0]])}")
+                
+                for token, since in list(abandoned.items()):
+                    if now - since > NETWORK_TIMEOUT:
+                        del abandoned[token]
+                        skip(token[0])
+                
+                # Storage that stopped answering (or threads stuck on earlier files
+                # holding every slot) would otherwise cost two timeouts per file
+                if waiting and now - last_answer > 3 * NETWORK_TIMEOUT:
+                    self.signals.debug.emit("Storage not responding, skipping remaining files")
+                    while waiting:
+                        skip(waiting.popleft()[0])
+                
+                # Size the window from observed latency (Little's law), capped by the backoff
+                wanted = NETWORK_MIN_IN_FLIGHT if latency is None else math.ceil(latency / NETWORK_TARGET_INTERVAL)
+                limit = max(NETWORK_MIN_IN_FLIGHT, min(ceiling, wanted))
+                
+                if now - last_report > 1.0:
+                    last_report = now
+                    self.signals.pending.emit([self.file_paths[index] for (index, _), started
+                                               in list(in_flight.items()) + list(abandoned.items())
+                                               if now - started > NETWORK_SLOW_AFTER])
+            
+            if self.is_cancelled:
+                self.signals.debug.emit("Processing cancelled")
+                # Report what was still outstanding when the user gave up
+                self.signals.pending.emit([self.file_paths[index] for index, _
+                                           in list(in_flight) + list(abandoned) + list(waiting)])
+            
+            self.signals.result.emit([file_data for file_data in results if file_data is not None])
+            if skipped:
+                self.signals.skipped.emit(skipped)
+        except Exception as e:
+            self.signals.error.emit(str(e))
+        finally:
+            self.signals.finished.emit()
+    
+    def read_file(self, token, completions):
+        index, _ = token
+        try:
+            file_data = self.process_file(self.file_paths[index])
+        except Exception as e:
+            self.signals.debug.emit(f"Read error: {str(e)}")
+            file_data = None
+        finally:
+            reader_slots.release()
+        completions.put((token, file_data))
+
+# Playback order: sequential/shuffle stepping, repeat modes and a "play next" queue
+class PlaybackOrder:
+    REPEAT_OFF = "off"
+    REPEAT_ALL = "all"
+    REPEAT_ONE = "one"
+    HISTORY_LIMIT = 10000  # shuffle steps kept for going back
+    
     def __init__(self):
+        self.shuffle = False
+        self.repeat = self.REPEAT_ALL
+        self.clear()
+    
+    def clear(self):
+        # Shuffle state refers to tracks by id (the order they were added in),
+        # ids are never renumbered so removing a track only records its id
+        self.next_id = 0
+        self.count = 0
+        self.removed = []  # sorted
+        self.removed_ids = set()
+        self.queue = deque()
+        self.history = []
+        self.cursor = -1
+        # Sequential mode: index the removed current track used to have
+        self.gap = None
+        self.reset_pool()
+    
+    def index_of(self, track_id):
+        return track_id - bisect.bisect_left(self.removed, track_id)
+    
+    def id_of(self, index):
+        # First j where removed[j] lies past the index-th live id; removed[j] - j never decreases
+        low, high = 0, len(self.removed)
+        while low < high:
+            middle = (low + high) // 2
+            if self.removed[middle] - middle > index:
+                high = middle
+            else:
+                low = middle + 1
+        return index + low
+    
+    def reset_pool(self):
+        """Start a new shuffle cycle over all tracks"""
+        # Lazy Fisher-Yates: positions [drawn, next_id) hold the ids not yet
+        # played this cycle, a position without an entry holds its own id
+        self.drawn = 0
+        self.slots = {}
+        self.positions = {}
+        for track_id in self.removed:
+            self.take(self.find(track_id))
+    
+    def slot(self, pos):
+        return self.slots.get(pos, pos)
+    
+    def set_slot(self, pos, track_id):
+        old = self.slots.pop(pos, None)
+        if old is not None:
+            del self.positions[old]
+        if track_id != pos:
+            self.slots[pos] = track_id
+            self.positions[track_id] = pos
+    
+    def find(self, track_id):
+        """Return the pool position of an id, or None if already played this cycle"""
+        pos = self.positions.get(track_id)
+        if pos is None and track_id >= self.drawn and track_id not in self.slots:
+            pos = track_id
+        return pos
+    
+    def take(self, pos):
+        """Remove the id at a pool position and return it"""
+        track_id = self.slot(pos)
+        first = self.slot(self.drawn)
+        self.set_slot(self.drawn, self.drawn)
+        if pos != self.drawn:
+            self.set_slot(pos, first)
+        self.drawn += 1
+        return track_id
+    
+    def record(self, track_id):
+        """Append a played id to the shuffle history, keeping it bounded"""
+        self.history.append(track_id)
+        if len(self.history) > 2 * self.HISTORY_LIMIT:
+            del self.history[:-self.HISTORY_LIMIT]
+        self.cursor = len(self.history) - 1
+    
+    def add(self, count):
+        """Register tracks appended to the end of the playlist"""
+        # New ids land at the end of the pool as identity positions
+        self.next_id += count
+        self.count += count
+    
+    def remove(self, index, was_current=False):
+        """Forget a track removed from the playlist, later indexes shift down"""
+        if was_current:
+            self.gap = index
+        elif self.gap is not None and index < self.gap:
+            self.gap -= 1
+        
+        track_id = self.id_of(index)
+        pos = self.find(track_id)
+        if pos is not None:
+            self.take(pos)
+        # History and queue entries of removed ids are skipped when reached
+        bisect.insort(self.removed, track_id)
+        self.removed_ids.add(track_id)
+        self.count -= 1
+    
+    def set_shuffle(self, enabled, current):
+        self.shuffle = enabled
+        self.history = []
+        self.cursor = -1
+        self.gap = None
+        self.reset_pool()
+        if enabled and 0 <= current < self.count:
+            self.visit(current)
+    
+    def enqueue(self, index):
+        """Play a track after the current one, ahead of the normal order"""
+        self.queue.append(self.id_of(index))
+    
+    def visit(self, index):
+        """Record that a track started playing"""
+        self.gap = None
+        if not self.shuffle:
+            return
+        track_id = self.id_of(index)
+        if 0 <= self.cursor < len(self.history) and self.history[self.cursor] == track_id:
+            return
+        
+        # Jumping to a track drops the forward history, like a browser
+        del self.history[self.cursor + 1:]
+        self.record(track_id)
+        
+        pos = self.find(track_id)
+        if pos is not None:
+            self.take(pos)
+    
+    def next(self, current, auto=False):
+        """Return the index to play after current, or None to stop"""
+        if self.count == 0:
+            return None
+        if auto and self.repeat == self.REPEAT_ONE and 0 <= current < self.count:
+            return current
+        while self.queue:
+            track_id = self.queue.popleft()
+            if track_id not in self.removed_ids:
+                return self.index_of(track_id)
+        
+        if not self.shuffle:
+            if current < 0 and self.gap is not None:
+                # Continue with the track that moved into the removed one's place
+                current = self.gap - 1
+            if current + 1 < self.count:
+                return current + 1
+            return 0 if self.repeat != self.REPEAT_OFF or current < 0 else None
+        
+        while self.cursor + 1 < len(self.history):
+            self.cursor += 1
+            if self.history[self.cursor] not in self.removed_ids:
+                return self.index_of(self.history[self.cursor])
+        if self.drawn >= self.next_id:
+            if self.repeat == self.REPEAT_OFF:
+                return None
+            self.reset_pool()
+        
+        track_id = self.take(random.randrange(self.drawn, self.next_id))
+        self.record(track_id)
+        return self.index_of(track_id)
+    
+    def previous(self, current):
+        """Return the index to play before current, or None to stay"""
+        if self.count == 0:
+            return None
+        if self.shuffle:
+            # Also steps back from a current track that was removed
+            cursor = self.cursor - 1
+            while cursor >= 0 and self.history[cursor] in self.removed_ids:
+                cursor -= 1
+            if cursor < 0:
+                return None
+            self.cursor = cursor
+            return self.index_of(self.history[cursor])
+        if current < 0 and self.gap is not None:
+            current = self.gap
+        if current > 0:
+            return current - 1
+        return self.count - 1 if self.repeat != self.REPEAT_OFF else None
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
+
+def parse_year(date):
+    """Return the year of a tag date such as "2003" or "2003-05-01", or None"""
+    year = date[:4]
+    return int(year) if year.isdigit() else None
+
+# Aggregates for an artist or album, updated per track instead of recomputed
+class LibraryNode:
+    def __init__(self, name):
+        self.name = name
+        self.track_count = 0
+        self.duration = 0.0
+        self.years = {}  # year -> number of tracks
+        self.min_year = None
+        self.max_year = None
+    
+    def count_track(self, duration, year):
+        self.track_count += 1
+        self.duration += duration
+        if year is not None:
+            self.years[year] = self.years.get(year, 0) + 1
+            if self.min_year is None or year < self.min_year:
+                self.min_year = year
+            if self.max_year is None or year > self.max_year:
+                self.max_year = year
+    
+    def uncount_track(self, duration, year):
+        self.track_count -= 1
+        self.duration = max(0.0, self.duration - duration)
+        if year is not None:
+            self.years[year] -= 1
+            if not self.years[year]:
+                del self.years[year]
+                # Only losing an extreme needs a pass, over distinct years only
+                if year == self.min_year:
+                    self.min_year = min(self.years, default=None)
+                if year == self.max_year:
+                    self.max_year = max(self.years, default=None)
+    
+    def year_text(self):
+        if self.min_year is None:
+            return ""
+        if self.min_year == self.max_year:
+            return str(self.min_year)
+        return f"{self.min_year}-{self.max_year}"
+
+class ArtistNode(LibraryNode):
+    def __init__(self, name):
+        super().__init__(name)
+        self.albums = {}  # album name -> AlbumNode
+
+class AlbumNode(LibraryNode):
+    def __init__(self, name):
+        super().__init__(name)
+        self.tracks = {}  # id(track) -> track, in the order they were added
+        self.cover = None
+        self.cover_track = None
+
+# Artist -> album -> track index over the playlist
+class LibraryIndex:
+    def __init__(self):
+        self.artists = {}
+    
+    def track_info(self, track):
+        metadata = track.get("metadata", {})
+        return (metadata.get("artist", "") or "Unknown Artist",
+                metadata.get("album", "") or "Unknown Album",
+                metadata.get("duration", 0.0),
+                parse_year(metadata.get("year", "")))
+    
+    def add(self, track):
+        """Count a track in and return its (artist, album) nodes"""
+        artist_name, album_name, duration, year = self.track_info(track)
+        artist = self.artists.get(artist_name)
+        if artist is None:
+            artist = self.artists[artist_name] = ArtistNode(artist_name)
+        album = artist.albums.get(album_name)
+        if album is None:
+            album = artist.albums[album_name] = AlbumNode(album_name)
+        
+        artist.count_track(duration, year)
+        album.count_track(duration, year)
+        album.tracks[id(track)] = track
+        if album.cover is None and track.get("metadata", {}).get("cover"):
+            album.cover = track["metadata"]["cover"]
+            album.cover_track = track
+        return artist, album
+    
+    def remove(self, track):
+        """Count a track out and return its (artist, album) nodes, dropping emptied ones"""
+        artist_name, album_name, duration, year = self.track_info(track)
+        artist = self.artists[artist_name]
+        album = artist.albums[album_name]
+        
+        artist.uncount_track(duration, year)
+        album.uncount_track(duration, year)
+        del album.tracks[id(track)]
+        if album.cover_track is track:
+            album.cover = None
+            album.cover_track = None
+            for other in album.tracks.values():
+                if other.get("metadata", {}).get("cover"):
+                    album.cover = other["metadata"]["cover"]
+                    album.cover_track = other
+                    break
+        
+        if not album.track_count:
+            del artist.albums[album_name]
+        if not artist.track_count:
+            del self.artists[artist_name]
+        return artist, album
+    
+    def clear(self):
+        self.artists = {}
+
+# Browser row that sorts the count, length and year columns by value, not text
+class BrowserItem(QTreeWidgetItem):
+    SORT_ROLE = Qt.ItemDataRole.UserRole + 2
+    
+    def __lt__(self, other):
+        # A row being inserted is not in the tree yet, the one it is compared to is
+        tree = self.treeWidget() or other.treeWidget()
+        column = tree.sortColumn() if tree else 0
+        mine = self.data(column, self.SORT_ROLE)
+        theirs = other.data(column, self.SORT_ROLE)
+        if mine is not None and theirs is not None:
+            return mine < theirs
+        return super().__lt__(other)
+
+class MediaPlayer(QMainWindow):
+    def __init__(self, instance_server=None):
         super().__init__()
         
         self.setWindowTitle("Quiro")
@@ -146,6 +764,9 @@ class MediaPlayer(QMainWindow):
         # Initialize thread pool for background tasks
         self.threadpool = QThreadPool()
         
+        # Filesystem used for ingestion (slowed down for testing via QUIRO_FS_DELAY)
+        self.filesystem = create_filesystem()
+        
         # Create media player and audio output
         self.media_player = QMediaPlayer()
         self.audio_output = QAudioOutput()
@@ -166,6 +787,18 @@ class MediaPlayer(QMainWindow):
         self.playlist_widget.setAlternatingRowColors(True)
         self.playlist_widget.doubleClicked.connect(self.playlist_item_double_clicked)
         self.playlist_widget.setObjectName("playlistWidget")
+        self.playlist_widget.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.playlist_widget.customContextMenuRequested.connect(self.show_playlist_menu)
+        
+        # Create artist/album browser, children are only built when expanded
+        self.browser_widget = QTreeWidget()
+        self.browser_widget.setHeaderLabels(["Artist / Album", "Tracks", "Length", "Year"])
+        self.browser_widget.setIconSize(QSize(32, 32))
+        self.browser_widget.setSortingEnabled(True)
+        self.browser_widget.sortByColumn(0, Qt.SortOrder.AscendingOrder)
+        self.browser_widget.itemExpanded.connect(self.populate_browser_item)
+        self.browser_widget.itemDoubleClicked.connect(self.browser_item_double_clicked)
+        self.browser_widget.setObjectName("browserWidget")
         
         # Create playlist controls layout
         playlist_controls = QHBoxLayout()
@@ -186,7 +819,11 @@ class MediaPlayer(QMainWindow):
         # Create playlist container
         playlist_container = QWidget()
         playlist_layout = QVBoxLayout(playlist_container)
-        playlist_layout.addWidget(self.playlist_widget)
+        library_splitter = QSplitter(Qt.Orientation.Horizontal)
+        library_splitter.addWidget(self.browser_widget)
+        library_splitter.addWidget(self.playlist_widget)
+        library_splitter.setSizes([350, 550])
+        playlist_layout.addWidget(library_splitter)
         playlist_layout.addLayout(playlist_controls)
         
         # Add playlist container to splitter
@@ -300,6 +937,15 @@ class MediaPlayer(QMainWindow):
         self.next_button.clicked.connect(self.play_next)
         self.next_button.setObjectName("playButton")
         
+        self.shuffle_button = QPushButton("Shuffle")
+        self.shuffle_button.setCheckable(True)
+        self.shuffle_button.toggled.connect(self.set_shuffle)
+        self.shuffle_button.setObjectName("modeButton")
+        
+        self.repeat_button = QPushButton("Repeat: All")
+        self.repeat_button.clicked.connect(self.cycle_repeat)
+        self.repeat_button.setObjectName("modeButton")
+        
         # Volume slider
         self.volume_slider = QSlider(Qt.Orientation.Horizontal)
         self.volume_slider.setRange(0, 100)
@@ -321,6 +967,8 @@ class MediaPlayer(QMainWindow):
         buttons_layout.addWidget(self.play_button)
         buttons_layout.addWidget(self.stop_button)
         buttons_layout.addWidget(self.next_button)
+        buttons_layout.addWidget(self.shuffle_button)
+        buttons_layout.addWidget(self.repeat_button)
         buttons_layout.addStretch()
         buttons_layout.addWidget(self.volume_button)
         buttons_layout.addWidget(self.volume_slider)
@@ -352,10 +1000,19 @@ class MediaPlayer(QMainWindow):
         
         # Playlist management
         self.playlist = []
+        self.track_indexes = {}  # id(track) -> index in self.playlist
         self.current_track_index = -1
+        self.play_order = PlaybackOrder()
+        
+        # Artist/album browser state
+        self.library = LibraryIndex()
+        self.browser_items = {}  # ArtistNode/AlbumNode -> tree item
+        self.populated_nodes = set()  # nodes whose children have been built
+        self.cover_icons = {}  # AlbumNode -> cover data currently shown
         
-        # Current file processor worker
+        # Current file processor worker, and whether a folder scan is running
         self.current_worker = None
+        self.scanning = False
         
         # Timer for status messages
         self.status_timer = QTimer()
@@ -367,6 +1024,48 @@ class MediaPlayer(QMainWindow):
 
         self.media_player.errorOccurred.connect(self.handle_media_error)
         
+        # Accept paths forwarded by later launches. A file manager opening several
+        # files starts one launch per file, so paths are collected into one batch
+        self.forwarded_paths = []
+        self.forward_timer = QTimer()
+        self.forward_timer.setSingleShot(True)
+        self.forward_timer.timeout.connect(self.open_forwarded_paths)
+        self.instance_server = instance_server
+        if self.instance_server is not None:
+            self.instance_server.setParent(self)
+            self.instance_server.newConnection.connect(self.accept_instance_connection)
+    
+    def accept_instance_connection(self):
+        while self.instance_server.hasPendingConnections():
+            socket = self.instance_server.nextPendingConnection()
+            buffer = bytearray()
+            socket.readyRead.connect(lambda s=socket, b=buffer: b.extend(s.readAll().data()))
+            socket.disconnected.connect(lambda s=socket, b=buffer: self.receive_forwarded_paths(s, b))
+    
+    def receive_forwarded_paths(self, socket, buffer):
+        """Open paths received from another launch and bring the window forward"""
+        buffer.extend(socket.readAll().data())
+        socket.deleteLater()
+        
+        self.setWindowState(self.windowState() & ~Qt.WindowState.WindowMinimized)
+        self.raise_()
+        self.activateWindow()
+        
+        paths = [os.fsdecode(path) for path in bytes(buffer).split(b"\0") if path]
+        if paths:
+            self.forwarded_paths.extend(paths)
+            self.forward_timer.start(INSTANCE_BATCH_MS)
+    
+    def open_forwarded_paths(self):
+        """Open the collected forwarded paths once no other ingestion is running"""
+        if not self.forwarded_paths:
+            return
+        if self.scanning or self.current_worker is not None:
+            # Called again from folder_scan_finished/add_files_finished
+            return
+        paths, self.forwarded_paths = self.forwarded_paths, []
+        self.open_paths(paths)
+        
     def handle_media_error(self, error, error_msg):
         self.show_status_message(f"Error: {error_msg}", 5000)
         self.debug_label.setText(f"Error: {error_msg}")
@@ -417,14 +1116,32 @@ class MediaPlayer(QMainWindow):
             self.clear_playlist_button.clicked.connect(self.cancel_processing)
             
             # Create worker for folder scanning
-            worker = Worker(self.scan_folder_for_audio, folder_path)
-            worker.signals.result.connect(self.process_folder_scan_result)
+            self.scanning = True
+            worker = Worker(self.collect_audio_files, [folder_path])
+            worker.signals.result.connect(self.process_paths_scan_result)
             worker.signals.finished.connect(self.folder_scan_finished)
             worker.signals.error.connect(self.handle_worker_error)
             
             # Execute the worker
             self.threadpool.start(worker)
     
+    def open_paths(self, paths):
+        """Add files and folders (e.g. from the command line) to the playlist"""
+        self.debug_label.setText(f"Scanning {len(paths)} item(s)...")
+        
+        # Change clear playlist button to cancel button
+        self.clear_playlist_button.setText("Cancel")
+        self.clear_playlist_button.clicked.disconnect()
+        self.clear_playlist_button.clicked.connect(self.cancel_processing)
+        
+        self.scanning = True
+        worker = Worker(self.collect_audio_files, paths)
+        worker.signals.result.connect(self.process_paths_scan_result)
+        worker.signals.finished.connect(self.folder_scan_finished)
+        worker.signals.error.connect(self.handle_worker_error)
+        
+        self.threadpool.start(worker)
+    
     def cancel_processing(self):
         """Cancel the current processing operation"""
         if self.current_worker:
@@ -446,21 +1163,37 @@ class MediaPlayer(QMainWindow):
         self.clear_playlist_button.clicked.disconnect()
         self.clear_playlist_button.clicked.connect(self.clear_playlist)
     
+    def call_filesystem(self, fn, *args):
+        """Call a filesystem operation, with timeout and retry on slow storage"""
+        if NETWORK_MODE:
+            return call_with_timeout(fn, *args)
+        return fn(*args)
+    
     def scan_folder_for_audio(self, folder_path):
+        return self.call_filesystem(self.filesystem.list_audio_files, folder_path)
+    
+    def collect_audio_files(self, paths):
+        """Expand folders and keep audio files, preserving argument order.
+        Returns the audio files and the paths that could not be read."""
         audio_files = []
-        dir = QDir(folder_path)
-        
-        # Set name filters for audio files
-        filters = ["*.mp3", "*.wav", "*.flac", "*.ogg", "*.m4a"]
-        dir.setNameFilters(filters)
-        
-        # Get all files matching the filters
-        file_list = dir.entryInfoList(QDir.Filter.Files)
-        
-        for file_info in file_list:
-            audio_files.append(file_info.absoluteFilePath())
-        
-        return audio_files
+        skipped = []
+        for path in paths:
+            try:
+                if self.call_filesystem(self.filesystem.is_dir, path):
+                    audio_files.extend(self.scan_folder_for_audio(path))
+                elif path.lower().endswith(AUDIO_EXTENSIONS):
+                    audio_files.append(path)
+            except OSError as e:
+                # Includes TimeoutError, one stalled folder should not abort the rest
+                print(f"Scan error: {path}: {str(e)}")
+                skipped.append(path)
+        return audio_files, skipped
+    
+    def process_paths_scan_result(self, result):
+        audio_files, skipped = result
+        self.process_folder_scan_result(audio_files)
+        if skipped:
+            self.report_skipped_files(skipped)
     
     def process_folder_scan_result(self, audio_files):
         if audio_files:
@@ -478,10 +1211,15 @@ class MediaPlayer(QMainWindow):
             self.clear_playlist_button.clicked.connect(self.clear_playlist)
     
     def folder_scan_finished(self):
-        # Reset the clear playlist button
-        self.clear_playlist_button.setText("Clear Playlist")
-        self.clear_playlist_button.clicked.disconnect()
-        self.clear_playlist_button.clicked.connect(self.clear_playlist)
+        self.scanning = False
+        
+        # The scan may have handed its files to a file processor that is still running
+        if self.current_worker is None:
+            # Reset the clear playlist button
+            self.clear_playlist_button.setText("Clear Playlist")
+            self.clear_playlist_button.clicked.disconnect()
+            self.clear_playlist_button.clicked.connect(self.clear_playlist)
+            self.open_forwarded_paths()
     
     def extract_metadata(self, file_path):
         """Extract metadata from audio file"""
@@ -537,12 +1275,15 @@ class MediaPlayer(QMainWindow):
         self.clear_playlist_button.clicked.connect(self.cancel_processing)
         
         # Create worker for adding files
-        self.current_worker = FileProcessorWorker(file_paths)
+        worker_class = NetworkFileProcessorWorker if NETWORK_MODE else FileProcessorWorker
+        self.current_worker = worker_class(file_paths, self.filesystem)
         self.current_worker.signals.result.connect(self.update_playlist_with_processed_files)
         self.current_worker.signals.progress.connect(self.update_add_files_progress)
         self.current_worker.signals.finished.connect(self.add_files_finished)
         self.current_worker.signals.error.connect(self.handle_worker_error)
         self.current_worker.signals.debug.connect(self.update_debug_label)
+        self.current_worker.signals.pending.connect(self.update_pending_files)
+        self.current_worker.signals.skipped.connect(self.report_skipped_files)
         
         # Execute the worker
         self.threadpool.start(self.current_worker)
@@ -551,6 +1292,18 @@ class MediaPlayer(QMainWindow):
         """Update the debug label with a message"""
         self.debug_label.setText(message)
     
+    def update_pending_files(self, file_paths):
+        """Show files whose reads are still outstanding on slow storage"""
+        if file_paths:
+            names = ", ".join(os.path.basename(path) for path in file_paths[:3])
+            more = f" (+{len(file_paths) - 3} more)" if len(file_paths) > 3 else ""
+            self.debug_label.setText(f"Waiting on {len(file_paths)} file(s): {names}{more}")
+    
+    def report_skipped_files(self, file_paths):
+        for path in file_paths:
+            print(f"Skipped unreachable file: {path}")
+        self.show_status_message(f"Skipped {len(file_paths)} unreachable file(s)", 5000)
+    
     def update_add_files_progress(self, value):
         """Update progress in debug label"""
         total = len(self.current_worker.file_paths) if self.current_worker else 0
@@ -558,10 +1311,16 @@ class MediaPlayer(QMainWindow):
             self.debug_label.setText(f"Processing files: {value}/{total}")
     
     def update_playlist_with_processed_files(self, processed_files):
+        added_tracks = {}  # AlbumNode -> (ArtistNode, new tracks)
+        
         # Add the processed files to the playlist
         for file_data in processed_files:
+            self.track_indexes[id(file_data)] = len(self.playlist)
             self.playlist.append(file_data)
             
+            artist_node, album_node = self.library.add(file_data)
+            added_tracks.setdefault(album_node, (artist_node, []))[1].append(file_data)
+            
             # Create display text with metadata if available
             display_text = file_data["name"]
             metadata = file_data.get("metadata", {})
@@ -576,6 +1335,8 @@ class MediaPlayer(QMainWindow):
             
             self.playlist_widget.addItem(display_text)
         
+        self.play_order.add(len(processed_files))
+        self.update_browser(added_tracks)
         self.debug_label.setText(f"Added {len(processed_files)} tracks to playlist")
         self.show_status_message(f"Added {len(processed_files)} tracks to playlist")
     
@@ -586,11 +1347,26 @@ class MediaPlayer(QMainWindow):
         self.clear_playlist_button.setText("Clear Playlist")
         self.clear_playlist_button.clicked.disconnect()
         self.clear_playlist_button.clicked.connect(self.clear_playlist)
+        
+        # Paths forwarded while this batch was running
+        self.open_forwarded_paths()
     
     def clear_playlist(self):
         self.stop()
         self.playlist = []
+        self.track_indexes = {}
         self.playlist_widget.clear()
+        self.play_order.clear()
+        self.clear_browser()
+        self.reset_now_playing()
+        
+        # Clear debug label
+        self.debug_label.setText("")
+        
+        self.show_status_message("Playlist cleared")
+    
+    def reset_now_playing(self):
+        """Unload the current track and reset the track info display"""
         self.current_track_index = -1
         self.now_playing_label.setText("No track playing")
         
@@ -610,11 +1386,168 @@ class MediaPlayer(QMainWindow):
         self.total_time_label.setText("00:00")
         self.position_slider.setValue(0)
         self.position_slider.setRange(0, 0)
+    
+    def show_playlist_menu(self, pos):
+        item = self.playlist_widget.itemAt(pos)
+        if item is None:
+            return
+        index = self.playlist_widget.row(item)
+        
+        menu = QMenu(self)
+        play_next_action = menu.addAction("Play Next")
+        remove_action = menu.addAction("Remove")
+        action = menu.exec(self.playlist_widget.viewport().mapToGlobal(pos))
+        
+        if action == play_next_action:
+            self.play_order.enqueue(index)
+            self.show_status_message(f"Queued: {item.text()}")
+        elif action == remove_action:
+            self.remove_track(index)
+    
+    def remove_track(self, index):
+        """Remove a single track from the playlist"""
+        if not 0 <= index < len(self.playlist):
+            return
         
-        # Clear debug label
-        self.debug_label.setText("")
+        was_current = index == self.current_track_index
+        if was_current:
+            self.stop()
+            self.reset_now_playing()
+        elif index < self.current_track_index:
+            self.current_track_index -= 1
+        
+        self.remove_from_browser(self.playlist[index])
+        del self.track_indexes[id(self.playlist[index])]
+        del self.playlist[index]
+        for track in self.playlist[index:]:
+            self.track_indexes[id(track)] -= 1
+        self.playlist_widget.takeItem(index)
+        self.play_order.remove(index, was_current)
+        
+        if self.current_track_index >= 0:
+            self.playlist_widget.setCurrentRow(self.current_track_index)
+    
+    def make_browser_item(self, node):
+        item = BrowserItem()
+        item.setData(0, Qt.ItemDataRole.UserRole, node)
+        item.setChildIndicatorPolicy(QTreeWidgetItem.ChildIndicatorPolicy.ShowIndicator)
+        item.setText(0, node.name)
+        self.browser_items[node] = item
+        self.update_browser_item(item, node)
+        return item
+    
+    def make_track_item(self, album_node, track):
+        metadata = track.get("metadata", {})
+        item = BrowserItem([metadata.get("title", "") or track["name"], "",
+                            format_duration(metadata.get("duration", 0.0)), metadata.get("year", "")])
+        item.setData(1, BrowserItem.SORT_ROLE, 1)
+        item.setData(2, BrowserItem.SORT_ROLE, metadata.get("duration", 0.0))
+        item.setData(3, BrowserItem.SORT_ROLE, parse_year(metadata.get("year", "")) or 0)
+        # Playlist entries are dicts, which Qt would copy, so keep the album and the track id
+        item.setData(0, Qt.ItemDataRole.UserRole, album_node)
+        item.setData(0, Qt.ItemDataRole.UserRole + 1, id(track))
+        return item
+    
+    def update_browser_item(self, item, node):
+        """Refresh an artist or album row from its precomputed aggregates"""
+        item.setText(1, str(node.track_count))
+        item.setText(2, format_duration(node.duration))
+        item.setText(3, node.year_text())
+        item.setData(1, BrowserItem.SORT_ROLE, node.track_count)
+        item.setData(2, BrowserItem.SORT_ROLE, node.duration)
+        item.setData(3, BrowserItem.SORT_ROLE, node.min_year or 0)
+        
+        # Decode the album cover only when the representative track changes
+        if isinstance(node, AlbumNode) and self.cover_icons.get(node, self) is not node.cover:
+            self.cover_icons[node] = node.cover
+            icon = QIcon()
+            if node.cover:
+                pixmap = QPixmap()
+                pixmap.loadFromData(node.cover)
+                icon = QIcon(pixmap)
+            item.setIcon(0, icon)
+    
+    def populate_browser_item(self, item):
+        """Build the children of an artist or album the first time it is expanded"""
+        node = item.data(0, Qt.ItemDataRole.UserRole)
+        if node in self.populated_nodes or item.data(0, Qt.ItemDataRole.UserRole + 1) is not None:
+            return
+        self.populated_nodes.add(node)
         
-        self.show_status_message("Playlist cleared")
+        if isinstance(node, ArtistNode):
+            item.addChildren([self.make_browser_item(album_node) for album_node in node.albums.values()])
+        else:
+            item.addChildren([self.make_track_item(node, track) for track in node.tracks.values()])
+    
+    def update_browser(self, added_tracks):
+        """Bring the browser up to date with newly indexed tracks"""
+        for album_node, (artist_node, tracks) in added_tracks.items():
+            artist_item = self.browser_items.get(artist_node)
+            if artist_item is None:
+                self.browser_widget.addTopLevelItem(self.make_browser_item(artist_node))
+                continue
+            self.update_browser_item(artist_item, artist_node)
+            
+            # Rows below an artist exist only once it has been expanded
+            if artist_node not in self.populated_nodes:
+                continue
+            album_item = self.browser_items.get(album_node)
+            if album_item is None:
+                artist_item.addChild(self.make_browser_item(album_node))
+                continue
+            self.update_browser_item(album_item, album_node)
+            if album_node in self.populated_nodes:
+                album_item.addChildren([self.make_track_item(album_node, track) for track in tracks])
+    
+    def remove_from_browser(self, track):
+        artist_node, album_node = self.library.remove(track)
+        
+        album_item = self.browser_items.get(album_node)
+        if album_item is not None:
+            if album_node in self.populated_nodes:
+                for i in range(album_item.childCount()):
+                    if album_item.child(i).data(0, Qt.ItemDataRole.UserRole + 1) == id(track):
+                        album_item.takeChild(i)
+                        break
+            if album_node.track_count:
+                self.update_browser_item(album_item, album_node)
+            else:
+                album_item.parent().removeChild(album_item)
+                self.forget_browser_node(album_node)
+        
+        artist_item = self.browser_items[artist_node]
+        if artist_node.track_count:
+            self.update_browser_item(artist_item, artist_node)
+        else:
+            self.browser_widget.takeTopLevelItem(self.browser_widget.indexOfTopLevelItem(artist_item))
+            self.forget_browser_node(artist_node)
+    
+    def forget_browser_node(self, node):
+        self.browser_items.pop(node, None)
+        self.populated_nodes.discard(node)
+        self.cover_icons.pop(node, None)
+    
+    def clear_browser(self):
+        self.library.clear()
+        self.browser_widget.clear()
+        self.browser_items = {}
+        self.populated_nodes = set()
+        self.cover_icons = {}
+    
+    def browser_item_double_clicked(self, item, column):
+        track_id = item.data(0, Qt.ItemDataRole.UserRole + 1)
+        if track_id is None:
+            return
+        self.play_track(self.track_indexes[track_id])
+    
+    def set_shuffle(self, enabled):
+        self.play_order.set_shuffle(enabled, self.current_track_index)
+        self.show_status_message("Shuffle on" if enabled else "Shuffle off")
+    
+    def cycle_repeat(self):
+        modes = [PlaybackOrder.REPEAT_ALL, PlaybackOrder.REPEAT_ONE, PlaybackOrder.REPEAT_OFF]
+        self.play_order.repeat = modes[(modes.index(self.play_order.repeat) + 1) % len(modes)]
+        self.repeat_button.setText(f"Repeat: {self.play_order.repeat.capitalize()}")
     
     def playlist_item_double_clicked(self, index):
         self.play_track(index.row())
@@ -622,6 +1555,7 @@ class MediaPlayer(QMainWindow):
     def play_track(self, index):
         if 0 <= index < len(self.playlist):
             self.current_track_index = index
+            self.play_order.visit(index)
             self.playlist_widget.setCurrentRow(index)
             track = self.playlist[index]
             self.media_player.setSource(track["url"])
@@ -667,18 +1601,26 @@ class MediaPlayer(QMainWindow):
             self.play()
     
     def play_next(self):
-        if self.playlist:
-            next_index = (self.current_track_index + 1) % len(self.playlist)
+        next_index = self.play_order.next(self.current_track_index)
+        if next_index is not None:
             self.play_track(next_index)
     
     def play_previous(self):
-        if self.playlist:
-            prev_index = (self.current_track_index - 1) % len(self.playlist)
+        prev_index = self.play_order.previous(self.current_track_index)
+        if prev_index is not None:
             self.play_track(prev_index)
     
     def media_status_changed(self, status):
         if status == QMediaPlayer.MediaStatus.EndOfMedia:
-            self.play_next()
+            next_index = self.play_order.next(self.current_track_index, auto=True)
+            if next_index is None:
+                return
+            if next_index == self.current_track_index:
+                # Same source, restart it instead of reloading
+                self.media_player.setPosition(0)
+                self.play()
+            else:
+                self.play_track(next_index)
     
     def play(self):
         self.media_player.play()
@@ -697,7 +1639,9 @@ class MediaPlayer(QMainWindow):
             # If no track is currently selected (current_track_index == -1),
             # start playing the first track in the playlist
             if self.current_track_index == -1 and self.playlist:
-                self.play_track(0)
+                next_index = self.play_order.next(-1)
+                if next_index is not None:
+                    self.play_track(next_index)
             else:
                 self.media_player.play()
                 self.show_status_message("Playing")
@@ -740,6 +1684,11 @@ class MediaPlayer(QMainWindow):
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
-    player = MediaPlayer()
+    instance_server = claim_instance_server(launch_paths)
+    if instance_server is None:
+        sys.exit(0)
+    player = MediaPlayer(instance_server)
     player.show()
+    if launch_paths:
+        player.open_paths(launch_paths)
     sys.exit(app.exec())